@@ -1,122 +1,302 @@
+import asyncio
 import discord
+import sys
 from discord.ext import commands
 import json
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timezone
+from heapq import nlargest
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Constants
 INVITE_DATA_JSON = 'invite_data.json'
+INVITE_DATA_DIR = 'invite_data'
 INVITES_JSON = 'invites.json'
 CONFIG_JSON = 'config.json'
+FLUSH_INTERVAL = 2.0  # seconds between coalesced disk flushes
+INVITE_FETCH_TTL = 2.0  # seconds a fetched invite list stays fresh
+MEDALS = ("🥇", "🥈", "🥉")
+MILESTONES = frozenset({5, 10, 15, 20, 25, 30, 50})
 
 class Logger:
+    _last_ts_sec = 0
+    _last_ts_str = ""
+
     @staticmethod
     def log(message: str) -> None:
         """Log a message with a timestamp."""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"[{timestamp}] {message}")
+        now = int(time.time())
+        if now != Logger._last_ts_sec:
+            Logger._last_ts_sec = now
+            Logger._last_ts_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(now))
+        sys.stdout.write(f"[{Logger._last_ts_str}] {message}\n")
+
+def _by_successful_invites(item) -> int:
+    """Sort key for ranking (user_id, data) pairs by invite count."""
+    return item[1]['successful_invites']
+
+_now_iso_cache = [0, ""]
+
+def _now_iso() -> str:
+    """Current UTC time in ISO format, cached at one-second granularity."""
+    now = int(time.time())
+    if now != _now_iso_cache[0]:
+        _now_iso_cache[0] = now
+        _now_iso_cache[1] = datetime.fromtimestamp(now, timezone.utc).isoformat()
+    return _now_iso_cache[1]
 
 class FileManager:
     @staticmethod
     def read_json_file(file_path: str):
         """Read a JSON file and return its content."""
         if os.path.exists(file_path):
-            with open(file_path, 'r') as f:
+            with open(file_path, 'rb') as f:
                 try:
+                    if orjson is not None:
+                        return orjson.loads(f.read())
                     return json.load(f)
-                except json.JSONDecodeError:
+                except ValueError:
                     return {}
         return {}
 
     @staticmethod
-    def write_json_file(file_path: str, data) -> None:
-        """Write data to a JSON file."""
+    def serialize_json(data, pretty: bool = False) -> bytes:
+        """Serialize data to JSON bytes (compact unless pretty)."""
+        if orjson is not None:
+            return orjson.dumps(data, option=orjson.OPT_INDENT_2 if pretty else 0)
+        if pretty:
+            return json.dumps(data, indent=2).encode()
+        return json.dumps(data, separators=(',', ':')).encode()
+
+    @staticmethod
+    def write_bytes(file_path: str, payload: bytes) -> None:
+        """Write an already-serialized payload to a file atomically."""
         try:
-            with open(file_path, 'w') as f:
-                json.dump(data, f, indent=2)
+            tmp_path = file_path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
             Logger.log(f"{file_path} updated successfully.")
         except Exception as e:
             Logger.log(f"Error saving {file_path}: {str(e)}")
 
-# Load configuration
-config = FileManager.read_json_file(CONFIG_JSON)
-bot_token = config.get("bot_token")
-command_prefix = config.get("command_prefix", "!")
-intents = discord.Intents.default()
-intents.members = config.get("intents", {}).get("members", False)
-intents.invites = config.get("intents", {}).get("invites", False)
-intents.message_content = config.get("intents", {}).get("message_content", False)
+    @staticmethod
+    def write_json_file(file_path: str, data, pretty: bool = False) -> None:
+        """Write data to a JSON file atomically (compact unless pretty)."""
+        try:
+            payload = FileManager.serialize_json(data, pretty)
+        except Exception as e:
+            Logger.log(f"Error saving {file_path}: {str(e)}")
+            return
+        FileManager.write_bytes(file_path, payload)
 
 class InviteManager:
-    def __init__(self):
-        self.invite_data = FileManager.read_json_file(INVITE_DATA_JSON)
-        self.invites = FileManager.read_json_file(INVITES_JSON)
+    def __init__(self) -> None:
+        self.invite_data: dict[int, dict] = self._load_invite_data()
+        # Canonical store is a dict keyed by invite code (insertion-ordered);
+        # the JSON file keeps its list-of-entries format.
+        self.invites = {entry['code']: entry for entry in FileManager.read_json_file(INVITES_JSON)}
+        self._recruit_index = {}
+        self._code_to_inviter = {}
+        for inviter_id, data in self.invite_data.items():
+            for ledger_entry in data['recruitment_ledger']:
+                self._recruit_index.setdefault(ledger_entry['user_id'], []).append((inviter_id, ledger_entry))
+            for invite_code in data['active_invites']:
+                self._code_to_inviter[invite_code] = inviter_id
         self.guild_invite_caches = {}
+        self._invite_fetch_cache = {}
+        self._dirty = {"invites": False}
+        self._dirty_users = set()
+        self._invite_data_version = 0
+        self._flush_task = None
+        self._written_hashes = {}
 
-    async def validate_invites(self, guild):
-        """Validate invites and clean up inactive ones."""
-        try:
-            current_invites = await guild.invites()
-        except discord.Forbidden:
-            Logger.log(f"No permission to view invites in {guild.name}")
-            return
+    @staticmethod
+    def _user_shard_path(inviter_id: int) -> str:
+        return os.path.join(INVITE_DATA_DIR, f"{inviter_id}.json")
 
-        for inviter_id, data in self.invite_data.items():
-            active_invites = data['active_invites']
-            for invite_code in list(active_invites.keys()):
-                if invite_code not in {invite.code for invite in current_invites}:
-                    del active_invites[invite_code]
-                    Logger.log(f"Removed inactive invite {invite_code} from {data['username']}'s active invites")
+    @staticmethod
+    def _blank(user) -> dict:
+        """Fresh invite_data record for a user."""
+        return {
+            'username': str(user),
+            'active_invites': {},
+            'successful_invites': 0,
+            'recruitment_ledger': []
+        }
 
-        FileManager.write_json_file(INVITE_DATA_JSON, self.invite_data)
+    def _load_invite_data(self) -> dict[int, dict]:
+        """Load the per-user invite data shards, migrating the legacy aggregate file once.
+
+        Keys are int user ids in memory; they only become strings in
+        shard filenames and serialized JSON.
+        """
+        if os.path.isdir(INVITE_DATA_DIR):
+            data = {}
+            for name in os.listdir(INVITE_DATA_DIR):
+                if name.endswith('.json'):
+                    data[int(name[:-5])] = FileManager.read_json_file(os.path.join(INVITE_DATA_DIR, name))
+            return data
+
+        data = {int(k): v for k, v in FileManager.read_json_file(INVITE_DATA_JSON).items()}
+        if data:
+            os.makedirs(INVITE_DATA_DIR, exist_ok=True)
+            for inviter_id, entry in data.items():
+                FileManager.write_json_file(self._user_shard_path(inviter_id), entry)
+            Logger.log(f"Migrated {len(data)} users from {INVITE_DATA_JSON} to {INVITE_DATA_DIR}/")
+        return data
+
+    def _write_user(self, inviter_id: int) -> None:
+        """Persist a single user's shard under invite_data/."""
+        os.makedirs(INVITE_DATA_DIR, exist_ok=True)
+        FileManager.write_json_file(self._user_shard_path(inviter_id), self.invite_data[inviter_id])
+
+    def _ensure_flusher(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(self._flusher())
+
+    def _mark_dirty(self, name: str) -> None:
+        """Flag a data file as modified; the flusher writes it out later."""
+        self._dirty[name] = True
+        self._ensure_flusher()
+
+    def _mark_user_dirty(self, inviter_id: int) -> None:
+        """Flag one user's shard as modified; the flusher writes it out later."""
+        self._dirty_users.add(inviter_id)
+        self._invite_data_version += 1
+        self._ensure_flusher()
+
+    async def _flusher(self) -> None:
+        """Coalesce bursts of mutations into at most one write per interval."""
+        while any(self._dirty.values()) or self._dirty_users:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            await self.flush_now()
+
+    async def flush_now(self) -> None:
+        """Immediately write out any pending changes without blocking the event loop."""
+        # Serialize on the loop so the worker thread never races
+        # against handlers mutating the live dicts.
+        pending = []
+        while self._dirty_users:
+            inviter_id = self._dirty_users.pop()
+            self._queue_if_changed(pending, self._user_shard_path(inviter_id),
+                                   FileManager.serialize_json(self.invite_data[inviter_id]))
+        if self._dirty["invites"]:
+            self._dirty["invites"] = False
+            self._queue_if_changed(pending, INVITES_JSON,
+                                   FileManager.serialize_json(list(self.invites.values())))
+        if pending:
+            await asyncio.to_thread(self._write_batch, pending)
+
+    def _queue_if_changed(self, pending: list, file_path: str, payload: bytes) -> None:
+        """Queue a write only when the serialized payload actually differs from the last one written."""
+        digest = hash(payload)
+        if self._written_hashes.get(file_path) == digest:
+            return
+        self._written_hashes[file_path] = digest
+        pending.append((file_path, payload))
 
-    async def initialize_invites(self, guild):
+    @staticmethod
+    def _write_batch(pending: list) -> None:
+        """Write a batch of (path, payload) pairs in one worker-thread hop."""
+        os.makedirs(INVITE_DATA_DIR, exist_ok=True)
+        for file_path, payload in pending:
+            FileManager.write_bytes(file_path, payload)
+
+    async def fetch_invites(self, guild: discord.Guild, fresh: bool = False) -> list:
+        """Fetch a guild's invites, reusing a recent result during bursts.
+
+        Pass fresh=True where up-to-date use counts matter (join
+        attribution); the result still refreshes the shared cache.
+        """
+        if not fresh:
+            cached = self._invite_fetch_cache.get(guild.id)
+            if cached and time.monotonic() - cached[0] < INVITE_FETCH_TTL:
+                return cached[1]
+        invites = await guild.invites()
+        self._invite_fetch_cache[guild.id] = (time.monotonic(), invites)
+        return invites
+
+    async def validate_invites(self, guild: discord.Guild, current_invites=None) -> None:
+        """Validate invites and clean up inactive ones.
+
+        Accepts an already-fetched invite list to spare callers a second
+        API round-trip.
+        """
+        if current_invites is None:
+            try:
+                current_invites = await self.fetch_invites(guild)
+            except discord.Forbidden:
+                Logger.log(f"No permission to view invites in {guild.name}")
+                return
+
+        # Set-difference against the reverse index instead of scanning
+        # every tracked inviter's active_invites; work is O(stale codes).
+        current_codes = {invite.code for invite in current_invites}
+        for invite_code in list(self._code_to_inviter):
+            if invite_code in current_codes:
+                continue
+            inviter_id = self._code_to_inviter.pop(invite_code)
+            data = self.invite_data.get(inviter_id)
+            if data and data['active_invites'].pop(invite_code, None) is not None:
+                Logger.log(f"Removed inactive invite {invite_code} from {data['username']}'s active invites")
+                self._mark_user_dirty(inviter_id)
+
+    async def initialize_invites(self, guild: discord.Guild) -> None:
         """Initialize invite tracking for a guild."""
         Logger.log(f"\nInitializing invites for guild: {guild.name} (ID: {guild.id})")
-        self.guild_invite_caches[guild.id] = {}
+        guild_cache = self.guild_invite_caches[guild.id] = {}
         await self.validate_invites(guild)
 
         try:
-            invites = await guild.invites()
+            invites = await self.fetch_invites(guild)
             Logger.log(f"Found {len(invites)} existing invites")
-            existing_codes = {invite_entry['code'] for invite_entry in self.invites}
+            existing_codes = self.invites.keys()
+            touched_inviters = set()
+            new_invites = False
 
             for invite in invites:
-                self.guild_invite_caches[guild.id][invite.code] = invite.uses
+                guild_cache[invite.code] = invite.uses
+                inviter = invite.inviter
 
-                if invite.code not in existing_codes and invite.inviter:
+                if invite.code not in existing_codes and inviter:
                     invite_entry = {
                         "code": invite.code,
-                        "inviter_id": invite.inviter.id,
-                        "inviter_display_name": invite.inviter.display_name,
+                        "inviter_id": inviter.id,
+                        "inviter_display_name": inviter.display_name,
                         "channel_id": invite.channel.id,
-                        "created_at": invite.created_at.isoformat() if invite.created_at else datetime.utcnow().isoformat(),
+                        "created_at": invite.created_at.isoformat() if invite.created_at else _now_iso(),
                         "max_uses": invite.max_uses,
                         "temporary": invite.temporary,
                         "uses": invite.uses
                     }
-                    self.invites.append(invite_entry)
+                    self.invites[invite.code] = invite_entry
+                    new_invites = True
                     Logger.log(f"Added existing invite {invite.code} to invites.json")
 
-                if not invite.inviter:
+                if not inviter:
                     continue
 
-                inviter_id = str(invite.inviter.id)
-                if inviter_id not in self.invite_data:
-                    self.invite_data[inviter_id] = {
-                        'username': str(invite.inviter),
-                        'active_invites': {},
-                        'successful_invites': 0,
-                        'recruitment_ledger': []
-                    }
+                inviter_id = inviter.id
+                entry = self.invite_data.setdefault(inviter_id, self._blank(inviter))
+                if entry['active_invites'].get(invite.code) != invite.uses:
+                    entry['active_invites'][invite.code] = invite.uses
+                    touched_inviters.add(inviter_id)
+                self._code_to_inviter[invite.code] = inviter_id
 
-                if invite.code not in self.invite_data[inviter_id]['active_invites']:
-                    self.invite_data[inviter_id]['active_invites'][invite.code] = 0
-                self.invite_data[inviter_id]['active_invites'][invite.code] = invite.uses
-
-            FileManager.write_json_file(INVITE_DATA_JSON, self.invite_data)
-            FileManager.write_json_file(INVITES_JSON, self.invites)
-            Logger.log("Initial invite tracking data saved successfully")
+            for inviter_id in touched_inviters:
+                self._mark_user_dirty(inviter_id)
+            if new_invites:
+                self._mark_dirty("invites")
+            if touched_inviters or new_invites:
+                Logger.log("Initial invite tracking data queued for flush")
 
         except Exception as e:
             Logger.log(f"Error initializing invites for guild {guild.name}: {str(e)}")
@@ -126,6 +306,11 @@ class InviteBot(commands.Bot):
         super().__init__(command_prefix=command_prefix, intents=intents)
         self.invite_manager = InviteManager()
 
+    async def close(self):
+        """Flush any pending data before shutting down."""
+        await self.invite_manager.flush_now()
+        await super().close()
+
     async def on_ready(self):
         """Event handler that executes when the bot comes online."""
         Logger.log(f"Bot connected as {self.user.name} (ID: {self.user.id})")
@@ -141,6 +326,8 @@ class InviteBot(commands.Bot):
 
         for guild in self.guilds:
             await self.invite_manager.initialize_invites(guild)
+        # One combined write for everything the per-guild passes touched
+        await self.invite_manager.flush_now()
 
     async def on_invite_create(self, invite):
         """Handle new invite creation."""
@@ -151,43 +338,42 @@ class InviteBot(commands.Bot):
             Logger.log(f"Invite {invite.code} has no associated inviter, skipping tracking")
             return
 
-        inviter_id = str(invite.inviter.id)
+        inviter = invite.inviter
+        inviter_id = inviter.id
+        inviter_display = inviter.display_name
         Logger.log(f"Invite created by user ID {inviter_id}")
 
         # SECOND: Ensure the inviter exists in invite_data
-        if inviter_id not in self.invite_manager.invite_data:
-            self.invite_manager.invite_data[inviter_id] = {
-                'username': str(invite.inviter),
-                'active_invites': {},
-                'successful_invites': 0,
-                'recruitment_ledger': []
-            }
+        entry = self.invite_manager.invite_data.get(inviter_id)
+        if entry is None:
+            entry = self.invite_manager.invite_data[inviter_id] = InviteManager._blank(inviter)
             Logger.log(f"Created new entry for inviter ID {inviter_id}")
 
         # THIRD: Add the invite to the inviter's active_invites
-        if invite.code not in self.invite_manager.invite_data[inviter_id]['active_invites']:
-            self.invite_manager.invite_data[inviter_id]['active_invites'][invite.code] = 0
-            Logger.log(f"Added invite {invite.code} to {invite.inviter.display_name}'s active invites")
+        if invite.code not in entry['active_invites']:
+            entry['active_invites'][invite.code] = 0
+            Logger.log(f"Added invite {invite.code} to {inviter_display}'s active invites")
         else:
-            Logger.log(f"Invite {invite.code} already exists in {invite.inviter.display_name}'s active invites")
+            Logger.log(f"Invite {invite.code} already exists in {inviter_display}'s active invites")
+        self.invite_manager._code_to_inviter[invite.code] = inviter_id
 
-        # FOURTH: Write the updated invite_data back to invite_data.json
-        FileManager.write_json_file(INVITE_DATA_JSON, self.invite_manager.invite_data)
+        # FOURTH: Flag the inviter's shard for the coalesced flush
+        self.invite_manager._mark_user_dirty(inviter_id)
 
         # FIFTH: Add to invites list for general tracking
         invite_data_entry = {
             "code": invite.code,
-            "inviter_id": invite.inviter.id,
-            "inviter_display_name": invite.inviter.display_name,
+            "inviter_id": inviter_id,
+            "inviter_display_name": inviter_display,
             "channel_id": invite.channel.id,
-            "created_at": datetime.utcnow().isoformat(),
+            "created_at": _now_iso(),
             "max_uses": invite.max_uses,
             "temporary": invite.temporary,
             "uses": invite.uses
         }
 
-        self.invite_manager.invites.append(invite_data_entry)
-        FileManager.write_json_file(INVITES_JSON, self.invite_manager.invites)
+        self.invite_manager.invites[invite.code] = invite_data_entry
+        self.invite_manager._mark_dirty("invites")
         Logger.log(f"New invite {invite.code} created and added to tracking")
 
     async def on_invite_delete(self, invite):
@@ -196,27 +382,28 @@ class InviteBot(commands.Bot):
 
         # FIRST: Get the inviter_id from our invites data BEFORE removing anything
         inviter_id = None
-        for entry in self.invite_manager.invites:
-            if entry['code'] == invite.code:
-                inviter_id = str(entry['inviter_id'])  # Get the inviter_id from the invites.json entry
-                Logger.log(f"Found inviter ID {inviter_id} for invite {invite.code}")
-                break
+        removed_entry = self.invite_manager.invites.pop(invite.code, None)
+        if removed_entry:
+            inviter_id = removed_entry['inviter_id']  # Get the inviter_id from the invites.json entry
+            Logger.log(f"Found inviter ID {inviter_id} for invite {invite.code}")
 
         # SECOND: Remove from active_invites using the retrieved inviter_id
         if inviter_id:
             Logger.log(f"Checking active invites for inviter ID {inviter_id}")
 
-            if inviter_id in self.invite_manager.invite_data:
-                Logger.log(f"Current invite data for inviter {inviter_id}: {self.invite_manager.invite_data[inviter_id]}")
-        
-                if invite.code in self.invite_manager.invite_data[inviter_id]['active_invites']:
-                    del self.invite_manager.invite_data[inviter_id]['active_invites'][invite.code]
-                    Logger.log(f"Removed active invite {invite.code} from {self.invite_manager.invite_data[inviter_id]['username']}'s active invites")
-                
-                    # Write the updated invite_data back to invite_data.json
-                    FileManager.write_json_file(INVITE_DATA_JSON, self.invite_manager.invite_data)
+            entry = self.invite_manager.invite_data.get(inviter_id)
+            if entry is not None:
+                Logger.log(f"Current invite data for inviter {inviter_id}: {entry}")
+
+                if invite.code in entry['active_invites']:
+                    del entry['active_invites'][invite.code]
+                    self.invite_manager._code_to_inviter.pop(invite.code, None)
+                    Logger.log(f"Removed active invite {invite.code} from {entry['username']}'s active invites")
+
+                    # Flag the inviter's shard for the coalesced flush
+                    self.invite_manager._mark_user_dirty(inviter_id)
                 else:
-                    Logger.log(f"Invite {invite.code} not found in {self.invite_manager.invite_data[inviter_id]['username']}'s active invites")
+                    Logger.log(f"Invite {invite.code} not found in {entry['username']}'s active invites")
             else:
                 Logger.log(f"Inviter ID {inviter_id} not found in invite_data")
         else:
@@ -228,111 +415,122 @@ class InviteBot(commands.Bot):
                 del self.invite_manager.guild_invite_caches[invite.guild.id][invite.code]
                 Logger.log(f"Removed invite {invite.code} from guild cache")
 
-        # FOURTH: Remove from invites (this should happen last)
-        original_count = len(self.invite_manager.invites)
-        self.invite_manager.invites = [entry for entry in self.invite_manager.invites if entry['code'] != invite.code]
-
-        if len(self.invite_manager.invites) < original_count:
+        # FOURTH: Persist the removal (this should happen last)
+        if removed_entry:
             Logger.log(f"Removed invite {invite.code} from invite_manager.invites")
-            # Write the updated invites back to invites.json
-            FileManager.write_json_file(INVITES_JSON, self.invite_manager.invites)
+            # Flag the updated invites for the coalesced flush
+            self.invite_manager._mark_dirty("invites")
 
     async def on_member_join(self, member):
         """Handle new member joining the guild."""
         guild = member.guild
+        member_display = member.display_name
         Logger.log(f"\nMember joined: {member} (ID: {member.id}) in guild: {guild.name}")
 
         try:
-            await self.invite_manager.validate_invites(guild)
-            current_invites = await guild.invites()
-
-            for invite in current_invites:
-                if self.invite_manager.guild_invite_caches[guild.id].get(invite.code, 0) < invite.uses:
-                    for saved_invite in self.invite_manager.invites:
-                        if saved_invite['code'] == invite.code:
-                            inviter = guild.get_member(saved_invite['inviter_id'])
-
-                            if inviter:
-                                Logger.log(f"{member.display_name} joined using invite {invite.code} created by {inviter.display_name}")
-                                inviter_id = str(inviter.id)
-
-                                if inviter_id not in self.invite_manager.invite_data:
-                                    self.invite_manager.invite_data[inviter_id] = {
-                                        'username': str(inviter),
-                                        'active_invites': {},
-                                        'successful_invites': 0,
-                                        'recruitment_ledger': []
-                                    }
-
-                                if invite.code not in self.invite_manager.invite_data[inviter_id]['active_invites']:
-                                    self.invite_manager.invite_data[inviter_id]['active_invites'][invite.code] = 0
-                                self.invite_manager.invite_data[inviter_id]['active_invites'][invite.code] += 1
-                                previous_count = self.invite_manager.invite_data[inviter_id]['successful_invites']
-                                self.invite_manager.invite_data[inviter_id]['successful_invites'] += 1
-                                new_count = self.invite_manager.invite_data[inviter_id]['successful_invites']
-
-                                if new_count in [5, 10, 15, 20, 25, 30, 50] and previous_count < new_count:
-                                    try:
-                                        owner = guild.owner
-                                        milestone_message = (
-                                            f"Milestone Alert\n"
-                                            f"User     {inviter.display_name} has reached {new_count} successful invites!\n"
-                                            f"Latest recruit: {member.display_name}"
-                                        )
-                                        await owner.send(milestone_message)
-                                        Logger.log(f"Sent milestone notification to server owner for {inviter.display_name}")
-                                    except Exception as e:
-                                        Logger.log(f"Failed to send milestone notification: {str(e)}")
-
-                                # Check for unique user_id before adding to recruitment_ledger
-                                recruited_member = {
-                                    'user_id': str(member.id),
-                                    'username': str(member),
-                                    'display_name': str(member.display_name),
-                                    'initiation_date': datetime.utcnow().isoformat()
-                                }
-
-                                # Ensure unique user_id in recruitment_ledger
-                                if not any(entry['user_id'] == recruited_member['user_id'] for entry in self.invite_manager.invite_data[inviter_id]['recruitment_ledger']):
-                                    self.invite_manager.invite_data[inviter_id]['recruitment_ledger'].append(recruited_member)
-                                    Logger.log(f"Added {member.display_name} to {inviter.display_name}'s recruitment ledger.")
-
-                                FileManager.write_json_file(INVITE_DATA_JSON, self.invite_manager.invite_data)
-
-                                for invite_entry in self.invite_manager.invites:
-                                    if invite_entry['code'] == invite.code:
-                                        invite_entry['uses'] += 1
-                                        Logger.log(f"Updated invite {invite.code} usage to {invite_entry['uses']} in invites.json")
-                                        break
-
-                                FileManager.write_json_file(INVITES_JSON, self.invite_manager.invites)
-                                self.invite_manager.guild_invite_caches[guild.id][invite.code] = invite.uses
-                                break
+            current_invites = await self.invite_manager.fetch_invites(guild, fresh=True)
+            await self.invite_manager.validate_invites(guild, current_invites)
+            guild_cache = self.invite_manager.guild_invite_caches[guild.id]
+
+            used = next(
+                (invite for invite in current_invites if guild_cache.get(invite.code, 0) < invite.uses),
+                None
+            )
+            if used:
+                saved_invite = self.invite_manager.invites.get(used.code)
+                if saved_invite:
+                    inviter = guild.get_member(saved_invite['inviter_id'])
+
+                    if inviter:
+                        inviter_id = inviter.id
+                        inviter_display = inviter.display_name
+                        Logger.log(f"{member_display} joined using invite {used.code} created by {inviter_display}")
+
+                        entry = self.invite_manager.invite_data.setdefault(inviter_id, InviteManager._blank(inviter))
+
+                        if used.code not in entry['active_invites']:
+                            entry['active_invites'][used.code] = 0
+                        entry['active_invites'][used.code] += 1
+                        self.invite_manager._code_to_inviter[used.code] = inviter_id
+                        entry['successful_invites'] += 1
+                        new_count = entry['successful_invites']
+
+                        if new_count in MILESTONES:
+                            try:
+                                owner = guild.owner
+                                milestone_message = (
+                                    f"Milestone Alert\n"
+                                    f"User     {inviter_display} has reached {new_count} successful invites!\n"
+                                    f"Latest recruit: {member_display}"
+                                )
+                                await owner.send(milestone_message)
+                                Logger.log(f"Sent milestone notification to server owner for {inviter_display}")
+                            except Exception as e:
+                                Logger.log(f"Failed to send milestone notification: {str(e)}")
+
+                        # Check for unique user_id before adding to recruitment_ledger
+                        recruited_member = {
+                            'user_id': str(member.id),
+                            'username': str(member),
+                            'display_name': member_display,
+                            'initiation_date': _now_iso()
+                        }
+
+                        # Ensure unique user_id in recruitment_ledger
+                        prior_recruits = self.invite_manager._recruit_index.get(recruited_member['user_id'], ())
+                        if not any(owner == inviter_id for owner, _ in prior_recruits):
+                            entry['recruitment_ledger'].append(recruited_member)
+                            self.invite_manager._recruit_index.setdefault(recruited_member['user_id'], []).append((inviter_id, recruited_member))
+                            Logger.log(f"Added {member_display} to {inviter_display}'s recruitment ledger.")
+
+                        self.invite_manager._mark_user_dirty(inviter_id)
+
+                        saved_invite['uses'] += 1
+                        Logger.log(f"Updated invite {used.code} usage to {saved_invite['uses']} in invites.json")
+
+                        self.invite_manager._mark_dirty("invites")
+
+            # Sync the whole cache in one pass so leftover deltas can't
+            # be mis-attributed to the next member who joins
+            guild_cache.update({invite.code: invite.uses for invite in current_invites})
 
         except discord.Forbidden:
             Logger.log(f"Cannot check invites in {guild.name} - missing permissions")
 
-# Bot setup
-invite_bot = InviteBot(command_prefix=command_prefix, intents=intents)
+    async def on_member_update(self, before, after):
+        """Keep recruitment ledger display names in sync with nickname changes."""
+        if before.display_name == after.display_name:
+            return
+
+        ledger_entries = self.invite_manager._recruit_index.get(str(after.id))
+        if not ledger_entries:
+            return
+
+        for inviter_id, ledger_entry in ledger_entries:
+            ledger_entry['display_name'] = after.display_name
+            self.invite_manager._mark_user_dirty(inviter_id)
+        Logger.log(f"Updated ledger display name for {after} to {after.display_name}")
 
 # Command Definitions
-@invite_bot.tree.command(name="invites", description="Check your or another member's invite stats")
-async def invites(interaction: discord.Interaction, member: discord.Member = None):
-    target = member or interaction.user
-    target_id = str(target.id)
+def register_commands(invite_bot: InviteBot) -> None:
+    """Attach the slash commands to the bot's command tree."""
 
-    Logger.log(f"\n/invites command used by {interaction.user} for {target}")
+    @invite_bot.tree.command(name="invites", description="Check your or another member's invite stats")
+    async def invites(interaction: discord.Interaction, member: discord.Member = None):
+        target = member or interaction.user
+        target_id = target.id
 
-    if target_id in invite_bot.invite_manager.invite_data:
-        data = invite_bot.invite_manager.invite_data[target_id]
-        active = 0
+        Logger.log(f"\n/invites command used by {interaction.user} for {target}")
 
-        try:
-            current_invites = await interaction.guild.invites()
-            current_codes = [invite.code for invite in current_invites]
+        if target_id in invite_bot.invite_manager.invite_data:
+            data = invite_bot.invite_manager.invite_data[target_id]
+
+            # The per-guild invite cache is kept current by the
+            # create/delete/join handlers; no REST round-trip needed here.
+            current_codes = invite_bot.invite_manager.guild_invite_caches.get(interaction.guild.id, {}).keys()
 
             active_invites = {
-                code: times_used for code, times_used in data['active_invites'].items() 
+                code: times_used for code, times_used in data['active_invites'].items()
                 if code in current_codes
             }
             active = sum(active_invites.values())
@@ -343,46 +541,102 @@ async def invites(interaction: discord.Interaction, member: discord.Member = Non
                 f"• Recruited members: {', '.join(member['display_name'] for member in data['recruitment_ledger']) if data['recruitment_ledger'] else 'None'}"
             )
             Logger.log(f"Returning invite stats for {target.display_name}")
-        except Exception as e:
-            Logger.log(f"Error fetching invites: {str(e)}")
-            response = "❌ Error fetching invite data. Please try again later."
-    else:
-        response = f"{target.display_name} hasn't created any trackable invites yet."
-        Logger.log(f"No invite data found for {target.display_name}")
-
-    await interaction.response.send_message(response, ephemeral=True)
-
-@invite_bot.tree.command(name="invite_leaderboard", description="Show top inviters")
-async def leaderboard(interaction: discord.Interaction):
-    """Display the top 10 users by invite count."""
-    Logger.log(f"\n/leaderboard command used by {interaction.user}")
-
-    if not invite_bot.invite_manager.invite_data:
-        await interaction.response.send_message("No invite data available yet.")
-        return
-
-    sorted_data = sorted(
-        invite_bot.invite_manager.invite_data.items(),
-        key=lambda x: x[1]['successful_invites'],
-        reverse=True
-    )[:10]  # Top 10
-
-    embed = discord.Embed(
-        title="Invite Leaderboard",
-        color=discord.Color.green()
-    )
-
-    for index, (user_id, data) in enumerate(sorted_data, start=1):
-        embed.add_field(
-            name=f"{index}. {data['username']}",
-            value=f"**{data['successful_invites']}** members joined",
-            inline=False
-        )
-
-    Logger.log("Displaying leaderboard")
-    await interaction.response.send_message(embed=embed)
+        else:
+            response = f"{target.display_name} hasn't created any trackable invites yet."
+            Logger.log(f"No invite data found for {target.display_name}")
+
+        await interaction.response.send_message(response, ephemeral=True)
+
+    _leaderboard_cache = {}
+
+    async def _render_leaderboard(guild) -> discord.Embed:
+        """Build the leaderboard embed, reusing it until the data changes."""
+        manager = invite_bot.invite_manager
+        cached = _leaderboard_cache.get(guild.id)
+        if cached and cached[0] == manager._invite_data_version:
+            return cached[1]
+
+        sorted_data = nlargest(10, manager.invite_data.items(), key=_by_successful_invites)
+
+        if not guild.chunked:
+            # Warm the member cache for the displayed ids in one batched request
+            try:
+                await guild.query_members(user_ids=[user_id for user_id, _ in sorted_data], cache=True)
+            except Exception as e:
+                Logger.log(f"Member prefetch failed: {str(e)}")
+
+        fields = []
+        for index, (user_id, data) in enumerate(sorted_data, start=1):
+            member = guild.get_member(user_id)
+            if member and data['username'] != str(member):
+                # Persist the refreshed name only when it actually changed
+                data['username'] = str(member)
+                manager._mark_user_dirty(user_id)
+            rank = MEDALS[index - 1] if index <= 3 else f"{index}."
+            fields.append({
+                "name": f"{rank} {member.display_name if member else data['username']}",
+                "value": f"**{data['successful_invites']}** members joined",
+                "inline": False
+            })
+
+        embed = discord.Embed.from_dict({
+            "title": "Invite Leaderboard",
+            "color": discord.Color.green().value,
+            "fields": fields
+        })
+
+        _leaderboard_cache[guild.id] = (manager._invite_data_version, embed)
+        return embed
+
+    @invite_bot.tree.command(name="invite_leaderboard", description="Show top inviters")
+    async def leaderboard(interaction: discord.Interaction):
+        """Display the top 10 users by invite count."""
+        Logger.log(f"\n/leaderboard command used by {interaction.user}")
+
+        if not invite_bot.invite_manager.invite_data:
+            await interaction.response.send_message("No invite data available yet.")
+            return
+
+        # Copy the cached embed so the per-requester footer doesn't stick to it
+        embed = (await _render_leaderboard(interaction.guild)).copy()
+        user = interaction.user
+        avatar = user.avatar
+        embed.set_footer(text=f"Requested by {user.display_name}", icon_url=avatar.url if avatar else None)
+        Logger.log("Displaying leaderboard")
+        await interaction.response.send_message(embed=embed)
+
+    @invite_bot.tree.command(name="pretty", description="Rewrite the data files with readable formatting (admin only)")
+    async def pretty(interaction: discord.Interaction):
+        """Re-dump both data files with indentation for manual inspection."""
+        Logger.log(f"\n/pretty command used by {interaction.user}")
+
+        if not interaction.user.guild_permissions.administrator:
+            await interaction.response.send_message("Administrator permission required.", ephemeral=True)
+            return
+
+        manager = invite_bot.invite_manager
+        manager._dirty_users.clear()
+        manager._dirty["invites"] = False
+        for inviter_id in manager.invite_data:
+            FileManager.write_json_file(manager._user_shard_path(inviter_id), manager.invite_data[inviter_id], pretty=True)
+        FileManager.write_json_file(INVITES_JSON, list(manager.invites.values()), pretty=True)
+        await interaction.response.send_message("Data files rewritten with readable formatting.", ephemeral=True)
+
+# Bot setup
+def build_bot(config: dict) -> InviteBot:
+    """Construct the bot from config values and register its commands."""
+    intents = discord.Intents.default()
+    intents.members = config.get("intents", {}).get("members", False)
+    intents.invites = config.get("intents", {}).get("invites", False)
+    intents.message_content = config.get("intents", {}).get("message_content", False)
+
+    invite_bot = InviteBot(command_prefix=config.get("command_prefix", "!"), intents=intents)
+    register_commands(invite_bot)
+    return invite_bot
 
 # Run the bot
 if __name__ == "__main__":
     Logger.log("Starting bot...")
-    invite_bot.run(bot_token)
\ No newline at end of file
+    config = FileManager.read_json_file(CONFIG_JSON)
+    invite_bot = build_bot(config)
+    invite_bot.run(config.get("bot_token"))
\ No newline at end of file